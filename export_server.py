@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+export_server.py - Warm-cache local query server for ChatGPT JSON exports
+
+Loads an export once, keeps the parsed conversations together with the
+MemoryExtractor and PersonaScraper results in memory, and answers queries
+over a localhost TCP port or a Unix socket. Files are re-parsed only when
+their size or modification time changes, so repeated queries return in
+milliseconds instead of reparsing the whole export.
+
+Protocol: one JSON object per line in, one JSON object per line out.
+  {"command": "extract", "format": "json"}   TO:BIO / project / memory items
+  {"command": "extract", "format": "text"}   same, as formatted text
+  {"command": "summary"}                     counts for extract and persona data
+  {"command": "persona"}                     PersonaScraper result
+  {"command": "list"}                        conversations with message counts
+  {"command": "reload"}                      force a full reload
+
+⚠️ WARNING: This tool is for personal use only with YOUR OWN data exports.
+The server only binds to localhost or a Unix socket; do not expose it.
+
+If a file fails to parse (for example while a new export is still being
+copied over it), the previously loaded version keeps being served and
+every response carries an "errors" object naming the affected files.
+A broken file is only re-parsed once its size or mtime changes again.
+"""
+
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+
+from extract_to_bio import (MemoryExtractor, iter_conversations,
+                            add_prefilter_arguments, prefilter_options)
+from persona_scraper import PersonaScraper
+
+
+# Responses are single JSON lines and can be large for big exports
+STREAM_LIMIT = 1 << 30
+
+
+class CachedExport:
+    """Parsed state for one export file, keyed by its size and mtime."""
+
+    def __init__(self, path: Path, extractor_options: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.extractor_options = extractor_options or {}
+        self.signature = None
+        self.data: Any = None
+        self.extractor = MemoryExtractor(**self.extractor_options)
+        self.persona: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    @staticmethod
+    def stat_signature(path: Path):
+        st = path.stat()
+        return (st.st_size, st.st_mtime_ns)
+
+    def load(self) -> None:
+        """Parse the file and rebuild the cached extraction results."""
+        self.signature = self.stat_signature(self.path)
+        self.extractor = MemoryExtractor(**self.extractor_options)
+        self.persona = {}
+        self.error = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.data = None
+            self.error = str(e)
+            return
+
+        try:
+            self.extractor.extract_from_data(self.data)
+
+            # quiet: keep PersonaScraper's per-node warnings out of the server log
+            scraper = PersonaScraper(str(self.path), quiet=True)
+            scraper.scrape_recursive(self.data)
+            self.persona = scraper.persona_data
+        except Exception as e:
+            # Same per-file policy as extract_from_file / load_and_scrape
+            self.data = None
+            self.extractor = MemoryExtractor(**self.extractor_options)
+            self.persona = {}
+            self.error = f"Error processing file: {e}"
+
+
+class ExportCache:
+    """In-memory cache over an export file or directory of JSON files."""
+
+    def __init__(self, export_path: str, extractor_options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            export_path: Export JSON file or directory of JSON files
+            extractor_options: Keyword arguments for each MemoryExtractor
+                (prefilter settings)
+        """
+        self.export_path = Path(export_path)
+        self.extractor_options = extractor_options or {}
+        self.files: Dict[Path, CachedExport] = {}
+        # Load errors by file; a file that fails to re-parse keeps its last good state
+        self.errors: Dict[str, str] = {}
+        # (signature, error) of the last failed re-parse per file, so a file that
+        # stays broken is only retried once its size or mtime changes again
+        self._failed: Dict[Path, Any] = {}
+        self.loaded_at: Optional[float] = None
+        self._merged_extractor: Optional[MemoryExtractor] = None
+        self._merged_persona: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    def _discover(self) -> List[Path]:
+        if self.export_path.is_dir():
+            return sorted(self.export_path.rglob('*.json'))
+        if self.export_path.is_file() and self.export_path.suffix == '.json':
+            return [self.export_path]
+        if not self.export_path.exists():
+            raise FileNotFoundError(f"Export path not found: {self.export_path}")
+        raise ValueError(f"Unsupported file type: {self.export_path}")
+
+    def _load_changes(self, force: bool = False):
+        """Parse new or changed files; unchanged files keep their cached state."""
+        changed = []
+        errors = {}
+        failed = {}
+        paths = self._discover()
+        files = {}
+        for path in paths:
+            cached = self.files.get(path)
+            signature = CachedExport.stat_signature(path)
+            last_failure = self._failed.get(path)
+            if (not force and last_failure is not None
+                    and last_failure[0] == signature):
+                # Still the same broken file; keep the previous version
+                failed[path] = last_failure
+                errors[str(path)] = last_failure[1]
+            elif cached is None or force or cached.signature != signature:
+                fresh = CachedExport(path, self.extractor_options)
+                fresh.load()
+                if fresh.error is None:
+                    cached = fresh
+                    changed.append(str(path))
+                elif cached is not None and cached.error is None:
+                    # e.g. a new export still being copied over the old one;
+                    # keep serving the previous version until the file changes again
+                    error = f"{fresh.error} (serving previously loaded version)"
+                    failed[path] = (fresh.signature, error)
+                    errors[str(path)] = error
+                else:
+                    cached = fresh
+                    errors[str(path)] = fresh.error
+                    changed.append(str(path))
+            elif cached.error is not None:
+                errors[str(path)] = cached.error
+            files[path] = cached
+        changed.extend(str(path) for path in self.files if path not in files)
+        return files, changed, errors, failed
+
+    async def refresh(self, force: bool = False) -> List[str]:
+        """Reload new or changed files and drop removed ones.
+
+        Parsing runs in a worker thread so it never blocks the event loop;
+        the new state is swapped in on the loop so readers never see a
+        half-refreshed cache.
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            files, changed, errors, failed = await loop.run_in_executor(
+                None, self._load_changes, force)
+            self.errors = errors
+            self._failed = failed
+            if changed:
+                self.files = files
+                self._merged_extractor = None
+                self._merged_persona = None
+                self.loaded_at = time.time()
+            return changed
+
+    def merged_extractor(self) -> MemoryExtractor:
+        if self._merged_extractor is None:
+            merged = MemoryExtractor()
+            for cached in self.files.values():
+                merged.to_bio_items |= cached.extractor.to_bio_items
+                merged.projects |= cached.extractor.projects
+                merged.memories |= cached.extractor.memories
+                merged.skip_counts.update(cached.extractor.skip_counts)
+                merged.skip_chars.update(cached.extractor.skip_chars)
+            self._merged_extractor = merged
+        return self._merged_extractor
+
+    def merged_persona(self) -> Dict[str, Any]:
+        """Combine per-file persona data the same way load_and_scrape does."""
+        if self._merged_persona is not None:
+            return self._merged_persona
+        persona = {'bio': {}, 'profile': {}, 'memory': [], 'keywords': []}
+        keywords = set()
+        for cached in self.files.values():
+            if not cached.persona:
+                continue
+            persona['bio'].update(cached.persona['bio'])
+            persona['profile'].update(cached.persona['profile'])
+            persona['memory'].extend(cached.persona['memory'])
+            keywords.update(cached.persona['keywords'])
+        persona['keywords'] = sorted(keywords)
+        persona['metadata'] = {'source': str(self.export_path), 'version': '1.0.0'}
+        self._merged_persona = persona
+        return persona
+
+    def conversations(self) -> List[Dict[str, Any]]:
+        items = []
+        for path, cached in sorted(self.files.items()):
+            for conversation in iter_conversations(cached.data):
+                if not isinstance(conversation, dict):
+                    continue
+                if not any(k in conversation for k in ('mapping', 'messages', 'title')):
+                    continue
+                messages = sum(1 for node in conversation.get('mapping', {}).values()
+                               if isinstance(node, dict) and node.get('message'))
+                messages += len(conversation.get('messages', []))
+                items.append({
+                    'file': str(path),
+                    'id': conversation.get('id') or conversation.get('conversation_id'),
+                    'title': conversation.get('title'),
+                    'create_time': conversation.get('create_time'),
+                    'messages': messages,
+                })
+        return items
+
+    def summary(self) -> Dict[str, Any]:
+        extractor = self.merged_extractor()
+        persona = self.merged_persona()
+        return {
+            'source': str(self.export_path),
+            'files': len(self.files),
+            'errors': self.errors,
+            'loaded_at': self.loaded_at,
+            'to_bio': len(extractor.to_bio_items),
+            'projects': len(extractor.projects),
+            'memories': len(extractor.memories),
+            'skipped': dict(extractor.skip_counts),
+            'skipped_chars': dict(extractor.skip_chars),
+            'bio_fields': len(persona['bio']),
+            'profile_fields': len(persona['profile']),
+            'keywords': len(persona['keywords']),
+        }
+
+
+class ExportServer:
+    """Answer newline-delimited JSON queries against an ExportCache."""
+
+    def __init__(self, cache: ExportCache):
+        self.cache = cache
+
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._dispatch(request)
+        # Surface load errors on every answer so stale or partial results are visible
+        if self.cache.errors:
+            response['errors'] = self.cache.errors
+        return response
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get('command')
+        if command == 'reload':
+            changed = await self.cache.refresh(force=True)
+            return {'ok': True, 'reloaded': changed}
+
+        # Cheap stat check; only changed files are re-parsed
+        await self.cache.refresh()
+
+        if command == 'extract':
+            extractor = self.cache.merged_extractor()
+            if request.get('format', 'json') == 'text':
+                return {'ok': True, 'result': extractor.export_to_text()}
+            return {'ok': True, 'result': extractor.get_deduplicated_export()}
+        if command == 'summary':
+            return {'ok': True, 'result': self.cache.summary()}
+        if command == 'persona':
+            return {'ok': True, 'result': self.cache.merged_persona()}
+        if command == 'list':
+            return {'ok': True, 'result': self.cache.conversations()}
+        return {'ok': False, 'error': f"Unknown command: {command!r}"}
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                started = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    response = await self.handle_request(request)
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                response['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def query(request: Dict[str, Any], host: str = '127.0.0.1', port: int = 8765,
+                socket_path: Optional[str] = None) -> Dict[str, Any]:
+    """Send one request to a running server and return its response."""
+    if socket_path:
+        reader, writer = await asyncio.open_unix_connection(socket_path, limit=STREAM_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    try:
+        writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+def claim_socket_path(socket_path: str) -> None:
+    """Remove a stale Unix socket at socket_path, refusing to touch anything else."""
+    path = Path(socket_path)
+    if not path.exists():
+        return
+    if not path.is_socket():
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        # Nobody is listening; left behind by a server that did not shut down cleanly
+        path.unlink()
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"Another server is already listening on {socket_path}")
+
+
+async def serve(export_path: str, host: str = '127.0.0.1', port: int = 8765,
+                socket_path: Optional[str] = None,
+                extractor_options: Optional[Dict[str, Any]] = None) -> None:
+    """Load the export once and serve queries until cancelled."""
+    if socket_path:
+        # Fail before the (possibly slow) initial load if the path is taken
+        claim_socket_path(socket_path)
+
+    cache = ExportCache(export_path, extractor_options)
+    started = time.perf_counter()
+    await cache.refresh()
+    print(f"✓ Loaded {len(cache.files)} file(s) from {export_path} "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    server = ExportServer(cache)
+    if socket_path:
+        claim_socket_path(socket_path)
+        listener = await asyncio.start_unix_server(server.handle_client, path=socket_path)
+        socket_inode = Path(socket_path).stat().st_ino
+        print(f"🔌 Listening on unix socket {socket_path}", file=sys.stderr)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+        print(f"🔌 Listening on {host}:{port}", file=sys.stderr)
+
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        # Only remove the socket if it is still the one this server created
+        if (socket_path and Path(socket_path).is_socket()
+                and Path(socket_path).stat().st_ino == socket_inode):
+            Path(socket_path).unlink()
+
+
+def main():
+    """Main function to run the query server or send a single query."""
+    parser = argparse.ArgumentParser(
+        description='Serve extract/summary/list queries over a warm, in-memory export',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s conversations.json
+  %(prog)s export_directory/ --socket /tmp/export.sock
+  %(prog)s conversations.json --skip-role system --max-part-size 100000
+  %(prog)s --query summary
+  %(prog)s --socket /tmp/export.sock --query extract --format text
+        """
+    )
+
+    parser.add_argument(
+        'export',
+        nargs='?',
+        help='Export JSON file or directory to load (server mode)'
+    )
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        choices=['127.0.0.1', 'localhost', '::1'],
+        help='Loopback address to bind (default: 127.0.0.1)'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='TCP port (default: 8765)'
+    )
+
+    parser.add_argument(
+        '--socket',
+        help='Unix socket path to use instead of TCP'
+    )
+
+    parser.add_argument(
+        '--query',
+        choices=['extract', 'summary', 'persona', 'list', 'reload'],
+        help='Send a single query to a running server and print the response'
+    )
+
+    parser.add_argument(
+        '-f', '--format',
+        choices=['text', 'json'],
+        default='json',
+        help='Output format for extract queries (default: json)'
+    )
+
+    # Prefilter settings apply in server mode, same as extract_to_bio.py
+    add_prefilter_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.query:
+        request = {'command': args.query, 'format': args.format}
+        try:
+            response = asyncio.run(query(request, args.host, args.port, args.socket))
+        except OSError as e:
+            print(f"❌ Error: could not reach server: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.query == 'extract' and args.format == 'text' and response.get('ok'):
+            print(response['result'])
+            for path, error in response.get('errors', {}).items():
+                print(f"⚠️  {path}: {error}", file=sys.stderr)
+        else:
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+        sys.exit(0 if response.get('ok') else 1)
+
+    if not args.export:
+        parser.error('an export file or directory is required in server mode')
+
+    try:
+        asyncio.run(serve(args.export, args.host, args.port, args.socket,
+                          prefilter_options(args)))
+    except KeyboardInterrupt:
+        print("\nServer stopped.", file=sys.stderr)
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
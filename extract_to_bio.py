@@ -12,19 +12,276 @@ Produces a clean, deduplicated export for the Core Memory Stack.
 
 import json
 import re
+import sys
+import math
 import argparse
+from array import array
 from pathlib import Path
-from typing import List, Dict, Set, Any
-from collections import OrderedDict
+from typing import List, Dict, Set, Any, Optional, Tuple
+from collections import OrderedDict, Counter
+
+
+class MessageTable:
+    """
+    Flatten conversation messages into a columnar on-disk table.
+
+    Each column is written as a raw little-endian array so it can be
+    memory-mapped with numpy.memmap and scanned without reparsing JSON.
+    Message ids and text live in a shared UTF-8 string heap addressed by
+    offset/length columns. The to_bio and skip columns carry the
+    extractor's own per-message result, so building the table never
+    rescans text. Layout is described in columns.json.
+    """
+
+    FORMAT_VERSION = 1
+
+    # column name -> (array typecode, numpy dtype)
+    COLUMNS = OrderedDict([
+        ('conversation', ('I', '<u4')),
+        ('create_time', ('d', '<f8')),
+        ('role', ('B', 'u1')),
+        ('length', ('I', '<u4')),
+        ('to_bio', ('I', '<u4')),
+        ('skip', ('B', 'u1')),
+        ('id_offset', ('Q', '<u8')),
+        ('id_length', ('I', '<u4')),
+        ('text_offset', ('Q', '<u8')),
+        ('text_length', ('I', '<u4')),
+    ])
+
+    HEAP_FILE = 'strings.bin'
+    MANIFEST_FILE = 'columns.json'
+
+    def __init__(self):
+        self.columns = OrderedDict(
+            (name, array(typecode)) for name, (typecode, _) in self.COLUMNS.items()
+        )
+        self.heap = bytearray()
+        self.roles: List[str] = []
+        self.role_codes: Dict[str, int] = {}
+        # Code 0 means the message was scanned in full
+        self.skip_categories: List[str] = ['']
+        self.skip_codes: Dict[str, int] = {'': 0}
+        self.conversations: List[Dict[str, Any]] = []
+
+    def add_conversation(self, conversation: Dict[str, Any]) -> int:
+        """Register a conversation and return its index."""
+        self.conversations.append({
+            'id': conversation.get('id') or conversation.get('conversation_id'),
+            'title': conversation.get('title'),
+            'create_time': conversation.get('create_time'),
+        })
+        return len(self.conversations) - 1
+
+    def _role_code(self, role: str) -> int:
+        if role not in self.role_codes:
+            if len(self.roles) >= 255:
+                role = 'other'
+                if role in self.role_codes:
+                    return self.role_codes[role]
+            self.role_codes[role] = len(self.roles)
+            self.roles.append(role)
+        return self.role_codes[role]
+
+    def _skip_code(self, category: Optional[str]) -> int:
+        category = category or ''
+        if category not in self.skip_codes:
+            self.skip_codes[category] = len(self.skip_categories)
+            self.skip_categories.append(category)
+        return self.skip_codes[category]
+
+    def _intern(self, text: str):
+        data = text.encode('utf-8')
+        offset = len(self.heap)
+        self.heap.extend(data)
+        return offset, len(data)
+
+    @staticmethod
+    def message_text(message: Dict[str, Any]) -> str:
+        """Join the string parts of a message into a single text value."""
+        content = message.get('content')
+        if isinstance(content, str):
+            return content
+        if isinstance(content, dict):
+            parts = content.get('parts')
+            if isinstance(parts, list):
+                return "\n".join(p for p in parts if isinstance(p, str))
+            if isinstance(content.get('text'), str):
+                return content['text']
+        return ""
+
+    @staticmethod
+    def message_role(message: Dict[str, Any]) -> str:
+        author = message.get('author')
+        if isinstance(author, dict) and author.get('role'):
+            return str(author['role'])
+        if message.get('role'):
+            return str(message['role'])
+        return 'unknown'
+
+    def add_message(self, conversation_index: int, message: Dict[str, Any],
+                    to_bio: int = 0, skip: Optional[str] = None) -> None:
+        """
+        Append one message row to the table.
+
+        Args:
+            conversation_index: Index returned by add_conversation
+            message: Message object from the export
+            to_bio: Number of TO:BIO items the extractor accepted from it
+            skip: Prefilter skip category, if any of its text was skipped
+        """
+        text = self.message_text(message)
+        create_time = message.get('create_time')
+        try:
+            create_time = float(create_time) if create_time is not None else math.nan
+        except (TypeError, ValueError):
+            create_time = math.nan
+
+        id_offset, id_length = self._intern(str(message.get('id') or ''))
+        text_offset, text_length = self._intern(text)
+
+        cols = self.columns
+        cols['conversation'].append(conversation_index)
+        cols['create_time'].append(create_time)
+        cols['role'].append(self._role_code(self.message_role(message)))
+        cols['length'].append(len(text))
+        cols['to_bio'].append(to_bio)
+        cols['skip'].append(self._skip_code(skip))
+        cols['id_offset'].append(id_offset)
+        cols['id_length'].append(id_length)
+        cols['text_offset'].append(text_offset)
+        cols['text_length'].append(text_length)
+
+    def __len__(self) -> int:
+        return len(self.columns['conversation'])
+
+    def write(self, directory: Path) -> Path:
+        """Write columns, string heap and manifest into directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        manifest_columns = OrderedDict()
+        for name, (_, dtype) in self.COLUMNS.items():
+            column = self.columns[name]
+            # array typecode sizes are platform-dependent; the manifest is not
+            assert column.itemsize == int(dtype[-1]), \
+                f"column {name!r} has itemsize {column.itemsize}, expected {dtype}"
+            if sys.byteorder != 'little':
+                column = array(column.typecode, column)
+                column.byteswap()
+            filename = f"{name}.bin"
+            with open(directory / filename, 'wb') as f:
+                column.tofile(f)
+            manifest_columns[name] = {'file': filename, 'dtype': dtype}
+
+        with open(directory / self.HEAP_FILE, 'wb') as f:
+            f.write(self.heap)
+
+        manifest = {
+            'version': self.FORMAT_VERSION,
+            'rows': len(self),
+            'columns': manifest_columns,
+            'heap': {'file': self.HEAP_FILE, 'encoding': 'utf-8', 'size': len(self.heap)},
+            'roles': self.roles,
+            'skip_categories': self.skip_categories,
+            'conversations': self.conversations,
+        }
+        with open(directory / self.MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        return directory
+
+
+def load_message_table(directory: Path) -> Dict[str, Any]:
+    """
+    Memory-map a table written by MessageTable.write.
+
+    Returns a dict with one numpy array per column, the string heap as a
+    uint8 array under 'heap', and the manifest under 'manifest'.
+    Requires numpy.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("numpy is required to load message tables (pip install numpy)")
+
+    directory = Path(directory)
+    with open(directory / MessageTable.MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    rows = manifest['rows']
+    table: Dict[str, Any] = {'manifest': manifest}
+    for name, spec in manifest['columns'].items():
+        if rows:
+            table[name] = np.memmap(directory / spec['file'], dtype=spec['dtype'],
+                                    mode='r', shape=(rows,))
+        else:
+            table[name] = np.empty(0, dtype=spec['dtype'])
+    if manifest['heap']['size']:
+        table['heap'] = np.memmap(directory / manifest['heap']['file'], dtype='u1', mode='r')
+    else:
+        table['heap'] = np.empty(0, dtype='u1')
+    return table
+
+
+def iter_conversations(data: Any):
+    """Yield conversation objects from any supported export structure."""
+    if isinstance(data, list):
+        # Array of conversations
+        for item in data:
+            if isinstance(item, dict):
+                yield item
+    elif isinstance(data, dict):
+        # Single conversation or wrapped structure
+        if 'conversations' in data:
+            for conversation in data['conversations']:
+                yield conversation
+        else:
+            # Assume it's a single conversation
+            yield data
 
 
 class MemoryExtractor:
     """Extract and deduplicate memory and TO:BIO content from ChatGPT exports."""
     
-    def __init__(self):
+    # Nodes that carry tool output or code rather than notes. multimodal_text
+    # is left alone: its string parts are what the user typed next to an image
+    DEFAULT_SKIP_ROLES = frozenset(['tool'])
+    DEFAULT_SKIP_CONTENT_TYPES = frozenset([
+        'code',
+        'execution_output',
+        'computer_output',
+        'tether_browsing_display',
+        'tether_quote',
+        'system_error',
+    ])
+    # Parts longer than this (in characters) are treated as pasted documents
+    DEFAULT_MAX_PART_SIZE = 32768
+    
+    def __init__(self, table: Optional[MessageTable] = None,
+                 skip_roles: Optional[Set[str]] = None,
+                 skip_content_types: Optional[Set[str]] = None,
+                 max_part_size: Optional[int] = None):
+        """
+        Args:
+            table: Optional MessageTable to record every message into
+            skip_roles: author.role values whose text is not scanned
+            skip_content_types: content.content_type values whose text is not scanned
+            max_part_size: Skip text parts longer than this many characters (0 disables)
+        """
         self.memories: Set[str] = set()
         self.to_bio_items: Set[str] = set()
         self.projects: Set[str] = set()
+        self.table = table
+        
+        # Prefilter configuration and per-category skip counters
+        self.skip_roles = set(self.DEFAULT_SKIP_ROLES if skip_roles is None else skip_roles)
+        self.skip_content_types = set(
+            self.DEFAULT_SKIP_CONTENT_TYPES if skip_content_types is None else skip_content_types
+        )
+        self.max_part_size = self.DEFAULT_MAX_PART_SIZE if max_part_size is None else max_part_size
+        self.skip_counts: Counter = Counter()
+        self.skip_chars: Counter = Counter()
         
         # Patterns to match TO:BIO style content
         self.to_bio_patterns = [
@@ -38,19 +295,25 @@ class MemoryExtractor:
             re.compile(r'\bPROJECT\s*:\s*(.+?)(?:\n|$)', re.IGNORECASE | re.MULTILINE),
         ]
     
-    def extract_from_text(self, text: str) -> None:
-        """Extract memory content from a text string."""
-        if not text:
-            return
-        
-        # Extract TO:BIO content
+    def find_to_bio(self, text: str) -> List[str]:
+        """Return the TO:BIO items in text that pass the false-positive filter."""
+        items = []
         for pattern in self.to_bio_patterns:
-            matches = pattern.findall(text)
-            for match in matches:
+            for match in pattern.findall(text):
                 cleaned = match.strip()
                 # Filter out very short matches or common words that might be false positives
                 if cleaned and len(cleaned) > 3 and cleaned.lower() not in ['content', 'parts']:
-                    self.to_bio_items.add(cleaned)
+                    items.append(cleaned)
+        return items
+    
+    def extract_from_text(self, text: str) -> int:
+        """Extract memory content from a text string; return the TO:BIO items accepted."""
+        if not text:
+            return 0
+        
+        # Extract TO:BIO content
+        to_bio = self.find_to_bio(text)
+        self.to_bio_items.update(to_bio)
         
         # Extract project content
         for pattern in self.project_patterns:
@@ -59,20 +322,72 @@ class MemoryExtractor:
                 cleaned = match.strip()
                 if cleaned and len(cleaned) > 3:
                     self.projects.add(cleaned)
+        
+        return len(to_bio)
+    
+    def _record_skip(self, category: str, content: Any) -> None:
+        """Count a skipped node or part and the characters the scanner would have read."""
+        self.skip_counts[category] += 1
+        # Only plain-string content and string parts are ever scanned, so
+        # payloads kept elsewhere (e.g. content['text']) are not counted
+        if isinstance(content, str):
+            self.skip_chars[category] += len(content)
+        elif isinstance(content, dict) and isinstance(content.get('parts'), list):
+            self.skip_chars[category] += sum(
+                len(part) for part in content['parts'] if isinstance(part, str)
+            )
     
-    def extract_from_message(self, message: Dict[str, Any]) -> None:
-        """Extract memory content from a message object."""
-        # Extract from message content
-        if 'content' in message:
+    def should_skip_message(self, message: Dict[str, Any]) -> Optional[str]:
+        """Return the skip category for a message, or None if it should be scanned."""
+        author = message.get('author')
+        role = author.get('role') if isinstance(author, dict) else message.get('role')
+        if role in self.skip_roles:
+            return f"role:{role}"
+        
+        content = message.get('content')
+        if isinstance(content, dict):
+            content_type = content.get('content_type')
+            if content_type in self.skip_content_types:
+                return f"content_type:{content_type}"
+        return None
+    
+    def _scan_part(self, text: str) -> Optional[int]:
+        """Scan one text part; return its TO:BIO count, or None if skipped for size."""
+        if self.max_part_size and len(text) > self.max_part_size:
+            self._record_skip('part_size', text)
+            return None
+        return self.extract_from_text(text)
+    
+    def extract_from_message(self, message: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        """
+        Extract memory content from a message object.
+        
+        Returns the number of TO:BIO items accepted from the message and the
+        prefilter skip category, if any of its text was skipped.
+        """
+        if not isinstance(message, dict):
+            return 0, None
+        
+        # Extract from message content, unless the prefilter rules it out
+        to_bio = 0
+        skip_category = self.should_skip_message(message)
+        if skip_category:
+            self._record_skip(skip_category, message.get('content'))
+        elif 'content' in message:
             content = message['content']
+            parts = []
             if isinstance(content, str):
-                self.extract_from_text(content)
+                parts = [content]
             elif isinstance(content, dict):
                 # Handle structured content
                 if 'parts' in content:
-                    for part in content['parts']:
-                        if isinstance(part, str):
-                            self.extract_from_text(part)
+                    parts = [part for part in content['parts'] if isinstance(part, str)]
+            for part in parts:
+                count = self._scan_part(part)
+                if count is None:
+                    skip_category = 'part_size'
+                else:
+                    to_bio += count
         
         # Check for metadata or other fields
         if 'metadata' in message:
@@ -87,6 +402,8 @@ class MemoryExtractor:
                         for key, value in memory_data.items():
                             if isinstance(value, str):
                                 self.memories.add(f"{key}: {value}")
+        
+        return to_bio, skip_category
     
     def extract_from_conversation(self, conversation: Dict[str, Any]) -> None:
         """Extract memory content from a conversation object."""
@@ -94,16 +411,31 @@ class MemoryExtractor:
         if 'title' in conversation:
             self.extract_from_text(conversation['title'])
         
+        # Register conversation in the optional columnar table
+        conversation_index = None
+        if self.table is not None:
+            conversation_index = self.table.add_conversation(conversation)
+        
         # Extract from mapping structure (common in ChatGPT exports)
         if 'mapping' in conversation:
             for node_id, node_data in conversation['mapping'].items():
                 if 'message' in node_data and node_data['message']:
-                    self.extract_from_message(node_data['message'])
+                    to_bio, skip = self.extract_from_message(node_data['message'])
+                    if conversation_index is not None and isinstance(node_data['message'], dict):
+                        self.table.add_message(conversation_index, node_data['message'],
+                                               to_bio, skip)
         
         # Extract from messages array (alternative structure)
         if 'messages' in conversation:
             for message in conversation['messages']:
-                self.extract_from_message(message)
+                to_bio, skip = self.extract_from_message(message)
+                if conversation_index is not None and isinstance(message, dict):
+                    self.table.add_message(conversation_index, message, to_bio, skip)
+    
+    def extract_from_data(self, data: Any) -> None:
+        """Extract memory content from already-parsed export JSON."""
+        for conversation in iter_conversations(data):
+            self.extract_from_conversation(conversation)
     
     def extract_from_file(self, filepath: Path) -> None:
         """Extract memory content from a JSON file."""
@@ -111,20 +443,7 @@ class MemoryExtractor:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # Handle different JSON structures
-            if isinstance(data, list):
-                # Array of conversations
-                for item in data:
-                    if isinstance(item, dict):
-                        self.extract_from_conversation(item)
-            elif isinstance(data, dict):
-                # Single conversation or wrapped structure
-                if 'conversations' in data:
-                    for conversation in data['conversations']:
-                        self.extract_from_conversation(conversation)
-                else:
-                    # Assume it's a single conversation
-                    self.extract_from_conversation(data)
+            self.extract_from_data(data)
         
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON file {filepath}: {e}")
@@ -164,6 +483,74 @@ class MemoryExtractor:
         return "\n".join(output)
 
 
+def non_negative_int(value: str) -> int:
+    """argparse type for sizes where 0 means 'no limit'."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or greater, got {number}")
+    return number
+
+
+def add_prefilter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the MemoryExtractor prefilter options to a command-line parser."""
+    parser.add_argument(
+        '--skip-role',
+        action='append',
+        default=[],
+        metavar='ROLE',
+        help='Also skip messages with this author.role (repeatable; added to the default: '
+             + ', '.join(sorted(MemoryExtractor.DEFAULT_SKIP_ROLES)) + ')'
+    )
+    
+    parser.add_argument(
+        '--skip-content-type',
+        action='append',
+        default=[],
+        metavar='TYPE',
+        help='Also skip messages with this content.content_type (repeatable; added to the default: '
+             + ', '.join(sorted(MemoryExtractor.DEFAULT_SKIP_CONTENT_TYPES)) + ')'
+    )
+    
+    parser.add_argument(
+        '--no-default-skips',
+        action='store_true',
+        help='Start from empty role and content-type skip lists instead of the defaults'
+    )
+    
+    parser.add_argument(
+        '--max-part-size',
+        type=non_negative_int,
+        metavar='CHARS',
+        help=f'Skip text parts longer than CHARS (default: {MemoryExtractor.DEFAULT_MAX_PART_SIZE}, 0 disables)'
+    )
+    
+    parser.add_argument(
+        '--no-prefilter',
+        action='store_true',
+        help='Scan every message regardless of role, content type or size'
+    )
+
+
+def prefilter_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Turn parsed prefilter arguments into MemoryExtractor keyword arguments."""
+    if args.no_prefilter:
+        return {'skip_roles': set(), 'skip_content_types': set(), 'max_part_size': 0}
+    
+    skip_roles = set() if args.no_default_skips else set(MemoryExtractor.DEFAULT_SKIP_ROLES)
+    skip_content_types = (set() if args.no_default_skips
+                          else set(MemoryExtractor.DEFAULT_SKIP_CONTENT_TYPES))
+    skip_roles.update(args.skip_role)
+    skip_content_types.update(args.skip_content_type)
+    return {
+        'skip_roles': skip_roles,
+        'skip_content_types': skip_content_types,
+        'max_part_size': args.max_part_size,
+    }
+
+
 def main():
     """Main function to run the memory extractor."""
     parser = argparse.ArgumentParser(
@@ -174,6 +561,7 @@ Examples:
   %(prog)s conversations.json
   %(prog)s conversations.json -o output.txt
   %(prog)s *.json --format json
+  %(prog)s conversations.json --table message_table/
         """
     )
     
@@ -197,10 +585,20 @@ Examples:
         help='Output format (default: text)'
     )
     
+    parser.add_argument(
+        '--table',
+        type=Path,
+        metavar='DIR',
+        help='Also write a columnar message table to DIR (memory-mappable with NumPy)'
+    )
+    
+    add_prefilter_arguments(parser)
+    
     args = parser.parse_args()
     
     # Create extractor and process files
-    extractor = MemoryExtractor()
+    table = MessageTable() if args.table else None
+    extractor = MemoryExtractor(table=table, **prefilter_options(args))
     
     for filepath in args.files:
         if not filepath.exists():
@@ -225,6 +623,10 @@ Examples:
         print("\n" + "="*60)
         print(output)
     
+    if table is not None:
+        table.write(args.table)
+        print(f"Message table written to: {args.table} ({len(table)} rows)")
+    
     # Print summary
     total_items = len(extractor.to_bio_items) + len(extractor.projects) + len(extractor.memories)
     print(f"\nSummary:")
@@ -232,6 +634,11 @@ Examples:
     print(f"  Projects: {len(extractor.projects)}")
     print(f"  Other memories: {len(extractor.memories)}")
     print(f"  Total: {total_items}")
+    
+    if extractor.skip_counts:
+        print(f"\nSkipped by prefilter:")
+        for category, count in sorted(extractor.skip_counts.items()):
+            print(f"  {category}: {count} ({extractor.skip_chars[category]} chars)")
 
 
 if __name__ == '__main__':
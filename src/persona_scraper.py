@@ -19,14 +19,16 @@ from typing import Dict, List, Any
 class PersonaScraper:
     """Scrapes and extracts memory fragments from OpenAI exports"""
     
-    def __init__(self, export_path: str):
+    def __init__(self, export_path: str, quiet: bool = False):
         """
         Initialize the scraper with path to OpenAI export data
         
         Args:
             export_path: Path to the OpenAI export directory or file
+            quiet: Suppress the per-node scraping warnings
         """
         self.export_path = Path(export_path)
+        self.quiet = quiet
         self.persona_data = {
             'bio': {},
             'profile': {},
@@ -87,8 +89,9 @@ class PersonaScraper:
         
         # Memory extraction is currently DISABLED for safety
         # To enable: uncomment the code block above
-        print("⚠️  WARNING: Memory extraction is currently disabled for safety.")
-        print("    If you own this data and want to extract it, uncomment the code in scrape_memory_data()")
+        if not self.quiet:
+            print("⚠️  WARNING: Memory extraction is currently disabled for safety.")
+            print("    If you own this data and want to extract it, uncomment the code in scrape_memory_data()")
         
         return memory_data
     
@@ -121,7 +124,8 @@ class PersonaScraper:
         # ⚠️ SAFETY LIMIT: Restrict recursive depth to prevent deep data extraction
         # Maximum depth is reduced from 10 to 3 for safety
         if depth > 3:
-            print(f"⚠️  WARNING: Recursive depth limit (3) reached. Stopping further extraction.")
+            if not self.quiet:
+                print(f"⚠️  WARNING: Recursive depth limit (3) reached. Stopping further extraction.")
             return
         
         if isinstance(data, dict):